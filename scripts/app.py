@@ -1,8 +1,13 @@
+import json
 import logging
+import os
 from typing import Optional
 
 from fastapi import FastAPI, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.datastructures import Headers
 
 from .text_analysis import AI
 from .speech_to_text import Whisper
@@ -30,6 +35,56 @@ app = FastAPI(
     openapi_tags=tags_metadata,
 )
 
+# Uploads with a larger request body are rejected before they are parsed
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", 500 * 1024 * 1024))
+
+
+class UploadLimitMiddleware:
+    """
+    Reject request bodies larger than MAX_UPLOAD_BYTES before the form is parsed.
+
+    A declared Content-Length is checked up front; bodies sent without one are
+    counted while they stream in.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limit = MAX_UPLOAD_BYTES
+        content_length = Headers(scope=scope).get("content-length")
+        if content_length is not None:
+            try:
+                declared_length = int(content_length)
+            except ValueError:
+                response = JSONResponse({"detail": "Invalid Content-Length header."}, status_code=400)
+                await response(scope, receive, send)
+                return
+            if declared_length > limit:
+                response = JSONResponse({"detail": f"Upload too large: limit is {limit} bytes."}, status_code=413)
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    raise HTTPException(status_code=413, detail=f"Upload too large: limit is {limit} bytes.")
+            return message
+
+        await self.app(scope, limited_receive, send)
+
+
+app.add_middleware(UploadLimitMiddleware)
+
 # Add CORS middleware to allow cross-origin requests
 app.add_middleware(
     CORSMiddleware,
@@ -43,16 +98,14 @@ app.add_middleware(
 logging.basicConfig(level=logging.INFO)
 
 
-def process_audio(audio_data: bytes, filename: str, chunk_seconds: Optional[int]):
+def process_audio(audio_output_path: str, chunk_seconds: Optional[int]):
     """
-    Process audio data and perform speaker diarization.
+    Process an audio file and perform speaker diarization.
 
-    :param audio_data: Audio data in bytes.
-    :param filename: Name of the audio file.
+    :param audio_output_path: Path to the audio file written by write_audio.
     :param chunk_seconds: Optional backend chunk size in seconds. Use <= 0 to disable backend chunking when client-side chunking is already enabled.
     :return: Diarization result containing transcript and dialogue.
     """
-    audio_output_path = write_audio(audio_data, filename)
     if chunk_seconds is not None and chunk_seconds <= 0:
         transcript = whisper_api.transcribe_single_pass(audio_output_path)
     else:
@@ -88,6 +141,41 @@ def process_youtube_video(video_id: str, chunk_seconds: Optional[int]):
     return result
 
 
+def generate_ndjson(audio_output_path: str, chunk_seconds: Optional[int]):
+    """
+    Perform speaker diarization on an audio file, streaming progress as newline-delimited JSON.
+
+    Each transcribed chunk is emitted as {"chunk": index, "text": text} as soon as it is ready.
+    The last line holds the transcript and dialogue, or an error if processing failed midway.
+
+    :param audio_output_path: Path to the audio file.
+    :param chunk_seconds: Optional backend chunk size in seconds. Use <= 0 to disable backend chunking when client-side chunking is already enabled.
+    :return: Iterator of JSON lines.
+    """
+    try:
+        if chunk_seconds is not None and chunk_seconds <= 0:
+            chunks = [(0, whisper_api.transcribe_single_pass(audio_output_path))]
+        else:
+            chunks = whisper_api.transcribe_chunked_iter(audio_output_path, chunk_seconds=chunk_seconds)
+
+        transcript_chunks = {}
+        for index, text in chunks:
+            transcript_chunks[index] = text
+            yield json.dumps({"chunk": index, "text": text}) + "\n"
+
+        transcript = " ".join(
+            transcript_chunks[index].strip()
+            for index in sorted(transcript_chunks)
+            if transcript_chunks[index]
+        ).strip()
+        dialogue = openai_services.extract_dialogue(transcript)
+        yield json.dumps({"transcript": transcript, "diarization_result": dialogue}) + "\n"
+    except Exception as e:
+        # The status line has already been sent, so report the failure in the stream.
+        logging.exception(f"/speaker-diarization:/stream, {e}")
+        yield json.dumps({"error": "Internal server error"}) + "\n"
+
+
 def parse_chunk_seconds(chunk_seconds: Optional[str]) -> int:
     """
     Parse and validate the optional chunk_seconds form value.
@@ -116,6 +204,7 @@ async def speaker_diarization(
     audio_file: UploadFile = File(None),
     youtube_video_id: Optional[str] = Form(None),
     chunk_seconds: Optional[str] = Form(None),
+    stream: bool = Form(False),
 ):
     """
     Endpoint to perform speaker diarization on audio file or YouTube video.
@@ -123,20 +212,37 @@ async def speaker_diarization(
     :param audio_file: Uploaded audio file (if provided).
     :param youtube_video_id: ID of the YouTube video (if provided).
     :param chunk_seconds: Optional backend chunk size in seconds. Use <= 0 to disable backend chunking when client-side chunking is already enabled.
+    :param stream: Stream chunk transcripts as newline-delimited JSON while they complete.
     :return: Diarization result containing transcript and dialogue.
     """
     try:
         chosen_chunk_seconds = parse_chunk_seconds(chunk_seconds)
-        logging.info("/speaker-diarization chunk_seconds=%s", chosen_chunk_seconds)
+        logging.info("/speaker-diarization chunk_seconds=%s stream=%s", chosen_chunk_seconds, stream)
 
+        audio_output_path = None
         if audio_file is not None:
-            audio_data = await audio_file.read()
-            filename = audio_file.filename
-            response = process_audio(audio_data, filename, chunk_seconds=chosen_chunk_seconds)
+            # Copy the spooled upload to disk in chunks instead of reading it into memory.
+            audio_output_path = await run_in_threadpool(write_audio, audio_file.file, audio_file.filename)
+
+        if stream and (audio_output_path is not None or youtube_video_id):
+            if audio_output_path is None:
+                audio_output_path = await run_in_threadpool(downloader.download_video, youtube_video_id)
+            return StreamingResponse(
+                generate_ndjson(audio_output_path, chosen_chunk_seconds),
+                media_type="application/x-ndjson",
+            )
+
+        if audio_output_path is not None:
+            # Transcription blocks on ffmpeg and HTTP calls; keep it off the event loop.
+            response = await run_in_threadpool(
+                process_audio, audio_output_path, chunk_seconds=chosen_chunk_seconds
+            )
             return response
 
         if youtube_video_id:
-            response = process_youtube_video(youtube_video_id, chunk_seconds=chosen_chunk_seconds)
+            response = await run_in_threadpool(
+                process_youtube_video, youtube_video_id, chunk_seconds=chosen_chunk_seconds
+            )
             return response
 
         raise HTTPException(status_code=400, detail="Provide either audio_file or youtube_video_id")
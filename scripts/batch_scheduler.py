@@ -0,0 +1,120 @@
+import logging
+import threading
+import time
+from concurrent.futures import Future
+
+
+class BatchScheduler:
+    """
+    Collect audio segments from concurrent requests and transcribe them in length-bucketed batches.
+    """
+
+    def __init__(
+        self,
+        transcribe_batch,
+        sample_rate: int = 16000,
+        max_batch: int = 8,
+        max_wait_ms: int = 50,
+        bucket_edges=(10, 30, 120),
+    ):
+        """
+        Initialize the scheduler.
+
+        :param transcribe_batch: Callable taking a list of segments and returning one transcript per segment.
+        :param sample_rate: Sample rate of the submitted segments.
+        :param max_batch: Number of pending segments that triggers an immediate dispatch of a bucket.
+        :param max_wait_ms: Maximum time a segment waits for its bucket to fill.
+        :param bucket_edges: Upper duration bounds in seconds; longer segments share a final bucket.
+        """
+        self.transcribe_batch = transcribe_batch
+        self.sample_rate = sample_rate
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.bucket_edges = tuple(bucket_edges)
+        self._pending = [[] for _ in range(len(self.bucket_edges) + 1)]
+        self._deadlines = [None] * len(self._pending)
+        self._condition = threading.Condition()
+        self._worker = None
+
+    def _bucket_for(self, segment) -> int:
+        """
+        Get the bucket index for a segment based on its duration.
+
+        :param segment: Audio samples.
+        :return: Index into the pending buckets.
+        """
+        duration_seconds = len(segment) / self.sample_rate
+        for index, edge in enumerate(self.bucket_edges):
+            if duration_seconds < edge:
+                return index
+        return len(self.bucket_edges)
+
+    def submit(self, segment) -> Future:
+        """
+        Queue a segment for transcription.
+
+        :param segment: Audio samples.
+        :return: Future resolved with the segment transcript.
+        """
+        future = Future()
+        bucket = self._bucket_for(segment)
+        with self._condition:
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="batch-scheduler", daemon=True)
+                self._worker.start()
+            if not self._pending[bucket]:
+                self._deadlines[bucket] = time.monotonic() + self.max_wait
+            self._pending[bucket].append((segment, future))
+            self._condition.notify()
+        return future
+
+    def _next_batch(self):
+        """
+        Pop the next batch that is full or has waited long enough.
+
+        Must be called with the condition held.
+
+        :return: List of (segment, future) pairs, or None if no bucket is ready.
+        """
+        now = time.monotonic()
+        for index, pending in enumerate(self._pending):
+            if pending and (len(pending) >= self.max_batch or self._deadlines[index] <= now):
+                batch = pending[:self.max_batch]
+                del pending[:self.max_batch]
+                self._deadlines[index] = now + self.max_wait if pending else None
+                return batch
+        return None
+
+    def _run(self):
+        """
+        Dispatch ready batches until the process exits.
+        """
+        while True:
+            with self._condition:
+                batch = self._next_batch()
+                while batch is None:
+                    deadlines = [deadline for deadline in self._deadlines if deadline is not None]
+                    timeout = max(0.0, min(deadlines) - time.monotonic()) if deadlines else None
+                    self._condition.wait(timeout)
+                    batch = self._next_batch()
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        """
+        Transcribe one batch and resolve its futures.
+
+        :param batch: List of (segment, future) pairs.
+        """
+        # Skip segments whose caller cancelled the future while it was queued.
+        batch = [(segment, future) for segment, future in batch if future.set_running_or_notify_cancel()]
+        if not batch:
+            return
+        logging.info("Dispatching transcription batch (segments=%s).", len(batch))
+        try:
+            texts = self.transcribe_batch([segment for segment, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        for (_, future), text in zip(batch, texts):
+            future.set_result(text)
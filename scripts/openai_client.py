@@ -0,0 +1,21 @@
+import functools
+
+import httpx
+from openai import DefaultHttpxClient, OpenAI
+
+
+@functools.lru_cache(maxsize=None)
+def get_openai_client() -> OpenAI:
+    """
+    Get the OpenAI client shared by every service in the process.
+
+    Reusing one client keeps a single keep-alive HTTP/2 connection pool, so concurrent
+    chunk uploads and chat completions do not each pay for a new TLS handshake.
+
+    :return: The shared OpenAI client.
+    """
+    http_client = DefaultHttpxClient(
+        http2=True,
+        limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+    )
+    return OpenAI(http_client=http_client)
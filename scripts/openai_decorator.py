@@ -1,4 +1,5 @@
 import functools
+import random
 import time
 
 from openai import (
@@ -11,10 +12,31 @@ from openai import (
 )
 
 
-def retry_on_openai_errors(max_retry):
+def _retry_delay(error, retry, base_delay, max_delay):
     """
-    this function retries the function that it decorates in case of openai errors (RateLimitError, Timeout, APIError, APIConnectionError, InternalServerError, BadRequestError)`
+    Compute how long to wait before the next attempt.
+
+    :param error: The error raised by the last attempt.
+    :param retry: Number of attempts made so far.
+    :param base_delay: Backoff base in seconds.
+    :param max_delay: Upper bound of the backoff in seconds.
+    :return: Delay in seconds; the server's Retry-After for rate limits, otherwise exponential backoff with full jitter.
+    """
+    if isinstance(error, RateLimitError):
+        try:
+            return max(0.0, float(error.response.headers.get("retry-after")))
+        except (TypeError, ValueError):
+            pass
+    return random.uniform(0, min(max_delay, base_delay * 2 ** retry))
+
+
+def retry_on_openai_errors(max_retry, base_delay=0.25, max_delay=10.0):
+    """
+    this function retries the function that it decorates in case of transient openai errors (RateLimitError, Timeout, APIError, APIConnectionError, InternalServerError)`
+    BadRequestError is raised immediately, since retrying an invalid request cannot succeed.
     :param max_retry: the maximum number of retries
+    :param base_delay: the backoff base in seconds
+    :param max_delay: the maximum backoff between two attempts in seconds
     :return: the decorator
     """
     def decorator(func):
@@ -24,17 +46,19 @@ def retry_on_openai_errors(max_retry):
             while retry < max_retry:
                 try:
                     return func(*args, **kwargs)
+                except BadRequestError:
+                    raise
                 except (
                     APITimeoutError,
                     APIError,
                     APIConnectionError,
                     InternalServerError,
-                    BadRequestError,
                     RateLimitError,
                 ) as error:
                     retry += 1
-                    time.sleep(0.006)
                     print(f"Retrying {retry} time due to error: {error}")
+                    if retry < max_retry:
+                        time.sleep(_retry_delay(error, retry, base_delay, max_delay))
             raise Exception(f"Reached maximum number of retries ({max_retry})")
         return wrapper
     return decorator
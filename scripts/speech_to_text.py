@@ -1,15 +1,34 @@
+import bisect
+import functools
 import io
 import logging
 import os
 import subprocess
-import uuid
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional
 
-import auditok
-from openai import OpenAI
+import numpy as np
 import soundfile as sf
+import soxr
+import webrtcvad
 
+from .batch_scheduler import BatchScheduler
+from .openai_client import get_openai_client
 from .openai_decorator import retry_on_openai_errors
-from .utils import get_project_root
+
+__all__ = ["Whisper"]
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_audio(filepath: str, mtime: float):
+    """
+    Read the header of an audio file.
+
+    :param filepath: Path to the audio file.
+    :param mtime: Modification time of the file, so a rewritten file is probed again.
+    :return: soundfile info for the file.
+    """
+    return sf.info(filepath)
 
 
 class Whisper:
@@ -22,19 +41,45 @@ class Whisper:
         model_name: str = "gpt-4o-transcribe",
         whisper_sample_rate: int = 16000,
         chunk_seconds: int = 120,
+        max_workers: int = 8,
+        local_model_name: Optional[str] = None,
+        local_batch_size: int = 16,
+        upload_format: str = "opus",
     ):
         """
         Initialize the Whisper chatbot instance.
 
         :param model_name: The name of the OpenAI Whisper model to use.
         :param whisper_sample_rate: The sample rate for audio processing.
+        :param max_workers: Maximum number of chunks transcribed concurrently.
+        :param local_model_name: Optional faster-whisper model (e.g. "large-v3") used instead of the OpenAI API.
+        :param local_batch_size: Batch size for the local faster-whisper pipeline.
+        :param upload_format: Encoding of uploaded chunks, "opus" (24 kbps Ogg/Opus) or "wav" (16-bit PCM).
         """
         self.model_name = model_name
         self.whisper_sample_rate = whisper_sample_rate
+        self.upload_format = os.getenv("UPLOAD_FORMAT", upload_format).lower()
         self.default_chunk_seconds = self._clamp_chunk_seconds(
             os.getenv("CHUNK_SECONDS", chunk_seconds)
         )
-        self.client = OpenAI()
+        self.max_workers = self._parse_positive_int(
+            os.getenv("TRANSCRIBE_WORKERS", max_workers), default=8
+        )
+        self.local_batch_size = self._parse_positive_int(
+            os.getenv("WHISPER_BATCH_SIZE", local_batch_size), default=16
+        )
+        self.client = get_openai_client()
+        self.local_model = self._load_local_model(
+            os.getenv("WHISPER_LOCAL_MODEL", local_model_name)
+        )
+        # Segments from concurrent requests are pooled so the local model sees larger batches.
+        self.scheduler = None
+        if self.local_model is not None:
+            self.scheduler = BatchScheduler(
+                self.transcribe_local,
+                sample_rate=self.whisper_sample_rate,
+                max_wait_ms=self._parse_positive_int(os.getenv("BATCH_MAX_WAIT_MS", 50), default=50),
+            )
 
     @staticmethod
     def _clamp_chunk_seconds(chunk_seconds) -> int:
@@ -50,96 +95,239 @@ class Whisper:
             parsed_value = 120
         return max(10, min(600, parsed_value))
 
-    def vad_audiotok(self, audio_content, chunk_seconds: int):
+    @staticmethod
+    def _parse_positive_int(value, default: int) -> int:
         """
-        Perform voice activity detection using the audiotok package.
+        Parse a positive integer setting.
 
-        :param audio_content: Bytes of audio data.
-        :return: Chunks containing speech detected in the audio.
+        :param value: Requested value.
+        :param default: Value used when the request is not an integer.
+        :return: Parsed value, at least 1.
         """
-        audio_regions = auditok.split(
-            audio_content,
-            sr=self.whisper_sample_rate,
-            ch=1,
-            sw=2,
-            min_dur=0.5,
-            max_dur=chunk_seconds,
-            max_silence=0.3,
-            energy_threshold=30
+        try:
+            parsed_value = int(value)
+        except (TypeError, ValueError):
+            parsed_value = default
+        return max(1, parsed_value)
+
+    @staticmethod
+    def _load_local_model(local_model_name: Optional[str]):
+        """
+        Load the optional faster-whisper batched pipeline.
+
+        :param local_model_name: Name of the faster-whisper model, or None to use the OpenAI API only.
+        :return: A BatchedInferencePipeline instance, or None when disabled.
+        """
+        if not local_model_name:
+            return None
+
+        import faster_whisper
+        from faster_whisper import BatchedInferencePipeline, WhisperModel
+
+        # Segment boundaries are passed as clip_timestamps in seconds, which older releases read as sample indices.
+        version = tuple(int(part) for part in faster_whisper.__version__.split(".")[:2])
+        if version < (1, 2):
+            raise RuntimeError(
+                f"faster-whisper>=1.2 is required for local transcription (found {faster_whisper.__version__})."
+            )
+
+        logging.info("Loading local faster-whisper model %s.", local_model_name)
+        model = WhisperModel(
+            local_model_name,
+            device=os.getenv("WHISPER_DEVICE", "cuda"),
+            compute_type=os.getenv("WHISPER_COMPUTE_TYPE", "float16"),
         )
+        return BatchedInferencePipeline(model=model)
+
+    def vad_webrtc(
+        self,
+        wav,
+        sr: int,
+        chunk_seconds: int,
+        aggressiveness: int = 2,
+        frame_ms: int = 30,
+        min_dur: float = 0.5,
+        max_silence: float = 0.3,
+    ):
+        """
+        Perform voice activity detection using the WebRTC VAD.
+
+        Voiced frames separated by at most max_silence are merged into regions, and
+        regions longer than chunk_seconds are split.
+
+        :param wav: int16 mono samples.
+        :param sr: Sample rate of the samples (8, 16, 32 or 48 kHz).
+        :param chunk_seconds: Maximum region duration in seconds.
+        :return: List of (start_sample, end_sample) tuples containing speech.
+        """
+        vad = webrtcvad.Vad(aggressiveness)
+        frame_length = sr * frame_ms // 1000
+        max_gap_frames = int(max_silence * 1000 / frame_ms)
+        min_samples = int(min_dur * sr)
+        max_samples = chunk_seconds * sr
+        pcm = memoryview(np.ascontiguousarray(wav, dtype=np.int16)).cast('B')
+        frame_bytes = frame_length * 2
+
+        runs = []
+        run_start = None
+        last_voiced = None
+        for frame_index in range(len(wav) // frame_length):
+            offset = frame_index * frame_bytes
+            if not vad.is_speech(pcm[offset:offset + frame_bytes], sr):
+                continue
+            if run_start is None or frame_index - last_voiced - 1 > max_gap_frames:
+                if run_start is not None:
+                    runs.append((run_start, last_voiced + 1))
+                run_start = frame_index
+            last_voiced = frame_index
+        if run_start is not None:
+            runs.append((run_start, last_voiced + 1))
+
+        audio_regions = []
+        for run_start, run_end in runs:
+            start_sample = run_start * frame_length
+            end_sample = run_end * frame_length
+            if end_sample - start_sample < min_samples:
+                continue
+            for region_start in range(start_sample, end_sample, max_samples):
+                audio_regions.append((region_start, min(region_start + max_samples, end_sample)))
         return audio_regions
 
-    def _convert_to_wav_mono_16k(self, filepath: str) -> str:
+    def _load_mono_16k(self, filepath: str):
+        """
+        Decode an audio file to mono 16-bit PCM at the Whisper sample rate.
+
+        Decoding, downmixing and resampling run in-process with libsndfile and soxr.
+        ffmpeg is only spawned for containers libsndfile cannot read (e.g. mp4/webm).
+
+        :param filepath: Path to the source audio file.
+        :return: int16 numpy array of samples.
+        """
+        try:
+            info = _probe_audio(filepath, os.path.getmtime(filepath))
+            if info.samplerate == self.whisper_sample_rate and info.channels == 1 and info.subtype == 'PCM_16':
+                # Already in the target format: read the samples as they are stored.
+                wav, _ = sf.read(filepath, dtype='int16')
+                return wav
+
+            data, sr = sf.read(filepath, dtype='float32', always_2d=True)
+        except RuntimeError:
+            # Probing or decoding failed (e.g. an unsupported container or a truncated file).
+            return self._decode_with_ffmpeg(filepath)
+
+        mono = data.mean(axis=1)
+        if sr != self.whisper_sample_rate:
+            mono = soxr.resample(mono, sr, self.whisper_sample_rate, quality='HQ')
+        return (np.clip(mono, -1.0, 1.0) * 32767).astype(np.int16)
+
+    def _decode_with_ffmpeg(self, filepath: str):
         """
-        Convert an audio file to WAV mono 16 kHz format.
+        Decode an audio file to mono 16-bit PCM at the Whisper sample rate using ffmpeg.
 
         :param filepath: Path to the source audio file.
-        :return: Path to the converted WAV file.
+        :return: int16 numpy array of samples.
         """
-        root_path = get_project_root()
-        resources_path = f"{root_path}/resources/audios"
-        temp_wav_path = f"{resources_path}/{str(uuid.uuid4())}.wav"
-        subprocess.run(
+        result = subprocess.run(
             [
                 "ffmpeg",
                 "-i",
                 filepath,
+                "-f",
+                "s16le",
                 "-ar",
                 str(self.whisper_sample_rate),
                 "-ac",
                 "1",
-                "-y",
-                temp_wav_path,
+                "-",
             ],
             check=True,
-            stdout=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
             stderr=subprocess.DEVNULL,
         )
-        return temp_wav_path
+        return np.frombuffer(result.stdout, dtype=np.int16)
 
     def audio_process(self, wav_path, chunk_seconds: int, is_byte=False):
         """
         Process audio data, performing voice activity detection and segmenting the audio.
 
-        :param wav_path: Path to the audio file or audio bytes.
+        :param wav_path: int16 samples at whisper_sample_rate, path to a WAV file, or WAV bytes.
         :param is_byte: Boolean flag indicating if the input is audio bytes.
         :return: Segmented audio chunks containing detected speech.
         """
-        if not is_byte:
-            with open(wav_path, 'rb') as f:
-                wav_bytes = f.read()
-            wav, sr = sf.read(wav_path)
+        if isinstance(wav_path, np.ndarray):
+            wav, sr = wav_path, self.whisper_sample_rate
         else:
-            wav_bytes = wav_path
-            wav, sr = sf.read(io.BytesIO(wav_bytes))
-        audio_regions = self.vad_audiotok(wav_bytes, chunk_seconds=chunk_seconds)
-        wav_segments = []
+            # Decode once as 16-bit PCM, the sample format the VAD consumes.
+            source = io.BytesIO(wav_path) if is_byte else wav_path
+            wav, sr = sf.read(source, dtype='int16')
+        audio_regions = self.vad_webrtc(wav, sr, chunk_seconds=chunk_seconds)
         min_duration_seconds = 0.25
-        for r in audio_regions:
-            start = r.meta.start
-            end = r.meta.end
-            start_index = int(start * sr)
-            end_index = int(end * sr)
-            duration_seconds = max(0.0, end - start)
-            segment = wav[start_index:end_index]
-
-            if duration_seconds <= min_duration_seconds:
-                logging.info(
-                    "Skipping short chunk (duration=%.3fs <= %.2fs).",
-                    duration_seconds,
-                    min_duration_seconds,
-                )
-                continue
+        bounds = np.asarray(audio_regions, dtype=np.int64).reshape(-1, 2)
+        durations = np.maximum(0.0, (bounds[:, 1] - bounds[:, 0]) / sr)
+        short = durations <= min_duration_seconds
+        empty = ~short & (np.minimum(bounds[:, 1], len(wav)) <= bounds[:, 0])
 
-            if len(segment) == 0:
-                logging.info(
-                    "Skipping empty chunk (duration=%.3fs, samples=0).",
-                    duration_seconds,
-                )
-                continue
+        if short.any():
+            logging.info(
+                "Skipping %s short chunks (duration <= %.2fs).",
+                int(short.sum()),
+                min_duration_seconds,
+            )
+        if empty.any():
+            logging.info("Skipping %s empty chunks (samples=0).", int(empty.sum()))
 
-            wav_segments.append(segment)
-        return wav_segments
+        # Basic slices are views into wav, so no samples are copied here.
+        return [wav[start:end] for start, end in bounds[~(short | empty)]]
+
+    def transcribe_local(self, wav_segments) -> list:
+        """
+        Transcribe audio segments with the local faster-whisper pipeline in one batched call.
+
+        The segments are concatenated into a single buffer and their boundaries are passed
+        as clip timestamps, so the pipeline batches them without running its own VAD.
+
+        :param wav_segments: Mono audio segments sampled at whisper_sample_rate.
+        :return: One transcript per segment, in input order.
+        """
+        sr = self.whisper_sample_rate
+        # Whisper decodes at most 30 s per window, so longer segments are split into several clips.
+        max_clip_samples = 30 * sr
+        clip_timestamps = []
+        segment_starts = []
+        offset = 0
+        for segment in wav_segments:
+            segment_starts.append(offset / sr)
+            for clip_start in range(offset, offset + len(segment), max_clip_samples):
+                clip_end = min(clip_start + max_clip_samples, offset + len(segment))
+                clip_timestamps.append({"start": clip_start / sr, "end": clip_end / sr})
+            offset += len(segment)
+
+        audio = np.concatenate([self._to_float32(segment) for segment in wav_segments])
+        segments, _ = self.local_model.transcribe(
+            audio,
+            batch_size=self.local_batch_size,
+            clip_timestamps=clip_timestamps,
+        )
+
+        texts = [[] for _ in wav_segments]
+        for segment in segments:
+            # Small tolerance so float rounding at a boundary does not shift a segment back.
+            index = bisect.bisect_right(segment_starts, segment.start + 1e-3) - 1
+            texts[max(0, index)].append(segment.text.strip())
+        return [" ".join(text for text in segment_texts if text) for segment_texts in texts]
+
+    @staticmethod
+    def _to_float32(segment):
+        """
+        Convert an audio segment to float32 samples in [-1, 1].
+
+        :param segment: Audio samples as int16 PCM or floating point.
+        :return: float32 numpy array.
+        """
+        segment = np.asarray(segment)
+        if segment.dtype == np.int16:
+            return segment.astype(np.float32) / 32768.0
+        return segment.astype(np.float32, copy=False)
 
     def transcribe_single_pass(self, filepath: str) -> str:
         """
@@ -151,47 +339,98 @@ class Whisper:
         :param filepath: Path to the source audio file.
         :return: Full transcript text.
         """
-        temp_wav_path = None
-        try:
-            temp_wav_path = self._convert_to_wav_mono_16k(filepath)
-            wav, _ = sf.read(temp_wav_path)
+        wav = self._load_mono_16k(filepath)
+
+        if len(wav) == 0:
+            logging.warning(
+                "Single-pass conversion produced empty audio; falling back to raw transcription call."
+            )
+            return self.transcribe_raw(filepath)
 
-            if len(wav) == 0:
+        if self.scheduler is not None:
+            try:
+                return self.scheduler.submit(wav).result()
+            except Exception as e:
                 logging.warning(
-                    "Single-pass conversion produced empty audio; falling back to raw transcription call."
+                    "Local transcription failed (%s). Falling back to raw transcription call.",
+                    e,
                 )
                 return self.transcribe_raw(filepath)
+        return self.transcribe(wav)
 
-            return self.transcribe(wav)
-        finally:
-            if temp_wav_path and os.path.exists(temp_wav_path):
-                os.remove(temp_wav_path)
+    def _encode_opus(self, audio_file):
+        """
+        Encode audio samples as 24 kbps Ogg/Opus by piping them through ffmpeg.
+
+        :param audio_file: Mono int16 samples at whisper_sample_rate.
+        :return: Ogg bytes, or None if ffmpeg is unavailable or fails.
+        """
+        try:
+            result = subprocess.run(
+                [
+                    "ffmpeg",
+                    "-f",
+                    "s16le",
+                    "-ar",
+                    str(self.whisper_sample_rate),
+                    "-ac",
+                    "1",
+                    "-i",
+                    "-",
+                    "-c:a",
+                    "libopus",
+                    "-b:a",
+                    "24k",
+                    "-f",
+                    "ogg",
+                    "-",
+                ],
+                input=np.ascontiguousarray(audio_file, dtype=np.int16).tobytes(),
+                check=True,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+        except (OSError, subprocess.CalledProcessError) as e:
+            logging.warning("Opus encoding failed (%s); uploading WAV instead.", e)
+            return None
+        return result.stdout
+
+    def _encode_upload(self, audio_file):
+        """
+        Encode audio samples for upload to the transcription API.
+
+        :param audio_file: Mono int16 samples at whisper_sample_rate.
+        :return: (filename, bytes, content type) tuple accepted by the OpenAI SDK.
+        """
+        if self.upload_format == "opus":
+            # Opus is roughly 10x smaller than PCM, which matters most on slow uplinks.
+            ogg_bytes = self._encode_opus(audio_file)
+            if ogg_bytes is not None:
+                return "chunk.ogg", ogg_bytes, "audio/ogg"
+
+        # Encode in memory; the upload does not need a temporary file on disk.
+        audio_buffer = io.BytesIO()
+        sf.write(
+            audio_buffer,
+            audio_file,
+            self.whisper_sample_rate,
+            format='WAV',
+            subtype='PCM_16',
+        )
+        return "chunk.wav", audio_buffer.getvalue(), "audio/wav"
 
     @retry_on_openai_errors(max_retry=7)
     def transcribe(self, audio_file):
         """
         Transcribe the provided audio using the OpenAI API.
 
-        :param audio_file: Path to the audio file or audio bytes.
+        :param audio_file: Mono int16 samples at whisper_sample_rate.
         :return: Transcription text from the audio.
         """
-        root_path = get_project_root()
-        resources_path = f"{root_path}/resources/audios"
-        temp_wav_path = f"{resources_path}/{str(uuid.uuid4())}.wav"
-        with sf.SoundFile(
-            temp_wav_path,
-            'wb',
-            samplerate=self.whisper_sample_rate,
-            channels=1,
-        ) as f:
-            f.write(audio_file)
-
-        with open(temp_wav_path, 'rb') as audio_stream:
-            response = self.client.audio.transcriptions.create(
-                model=self.model_name,
-                file=audio_stream,
-            )
-        os.remove(temp_wav_path)
+        response = self.client.audio.transcriptions.create(
+            model=self.model_name,
+            file=self._encode_upload(audio_file),
+        )
         return response.text
 
     @retry_on_openai_errors(max_retry=7)
@@ -209,69 +448,130 @@ class Whisper:
             )
         return response.text
 
+    def _transcribe_fallback(self, filepath: str, chunk_seconds: int) -> str:
+        """
+        Transcribe the source file with a single raw transcription call.
+
+        :param filepath: Path to the source audio file.
+        :param chunk_seconds: Chunk size that was requested, for logging.
+        :return: Full transcript text.
+        """
+        full_transcript = self.transcribe_raw(filepath)
+        logging.info(
+            "Fallback transcription complete (chunk_seconds=%s, total_chunks=%s, transcript_chars=%s).",
+            chunk_seconds,
+            1,
+            len(full_transcript),
+        )
+        return full_transcript
+
+    def transcribe_chunked_iter(self, filepath: str, chunk_seconds=None):
+        """
+        Transcribe an audio file in chunks, yielding each chunk as soon as it is transcribed.
+
+        Chunks can complete out of order, so every item carries the chunk position.
+        Falls back to a single transcription call (yielded as chunk 0) if chunking
+        fails before any chunk has been yielded.
+
+        :param filepath: Path to the source audio file.
+        :return: Iterator of (index, text) tuples.
+        """
+        chosen_chunk_seconds = self._clamp_chunk_seconds(
+            self.default_chunk_seconds if chunk_seconds is None else chunk_seconds
+        )
+        try:
+            wav = self._load_mono_16k(filepath)
+            wav_segments = self.audio_process(wav, chunk_seconds=chosen_chunk_seconds)
+        except Exception as e:
+            logging.warning(
+                "Chunked transcription failed (%s). Falling back to single transcription call.",
+                e,
+            )
+            yield 0, self._transcribe_fallback(filepath, chosen_chunk_seconds)
+            return
+
+        if not wav_segments:
+            logging.warning("No audio chunks detected, falling back to single transcription call.")
+            yield 0, self._transcribe_fallback(filepath, chosen_chunk_seconds)
+            return
+
+        total_chunks = len(wav_segments)
+        logging.info(
+            "Starting chunked transcription (chunk_seconds=%s, total_chunks=%s).",
+            chosen_chunk_seconds,
+            total_chunks,
+        )
+        executor = None
+        if self.scheduler is not None:
+            futures = [self.scheduler.submit(segment) for segment in wav_segments]
+        else:
+            # Chunks are independent HTTP uploads, so send them concurrently.
+            executor = ThreadPoolExecutor(max_workers=min(self.max_workers, total_chunks))
+            futures = [executor.submit(self.transcribe, segment) for segment in wav_segments]
+        positions = {future: index for index, future in enumerate(futures)}
+
+        yielded = False
+        try:
+            for future in as_completed(futures):
+                try:
+                    text = future.result()
+                except Exception as e:
+                    if yielded:
+                        raise
+                    logging.warning(
+                        "Chunked transcription failed (%s). Falling back to single transcription call.",
+                        e,
+                    )
+                    # Stop the remaining chunk uploads before sending the whole file again.
+                    for pending in futures:
+                        pending.cancel()
+                    yield 0, self._transcribe_fallback(filepath, chosen_chunk_seconds)
+                    return
+                yielded = True
+                yield positions[future], text
+        finally:
+            if executor is not None:
+                # Drop queued uploads if the consumer stops early or a chunk failed.
+                executor.shutdown(wait=False, cancel_futures=True)
+
     def transcribe_chunked(self, filepath: str, chunk_seconds=None) -> str:
         """
         Transcribe an audio file in chunks and return a merged transcript.
 
-        Falls back to a single transcription call if chunking fails.
+        Falls back to a single transcription call if chunking fails after some chunks completed.
 
         :param filepath: Path to the source audio file.
         :return: Full transcript text.
         """
-        temp_wav_path = None
         chosen_chunk_seconds = self._clamp_chunk_seconds(
             self.default_chunk_seconds if chunk_seconds is None else chunk_seconds
         )
+        transcript_chunks = {}
         try:
-            temp_wav_path = self._convert_to_wav_mono_16k(filepath)
-            wav_segments = self.audio_process(temp_wav_path, chunk_seconds=chosen_chunk_seconds)
-
-            if not wav_segments:
-                logging.warning("No audio chunks detected, falling back to single transcription call.")
-                full_transcript = self.transcribe_raw(filepath)
-                logging.info(
-                    "Fallback transcription complete (chunk_seconds=%s, total_chunks=%s, transcript_chars=%s).",
-                    chosen_chunk_seconds,
-                    1,
-                    len(full_transcript),
-                )
-                return full_transcript
-
-            total_chunks = len(wav_segments)
-            logging.info(
-                "Starting chunked transcription (chunk_seconds=%s, total_chunks=%s).",
-                chosen_chunk_seconds,
-                total_chunks,
-            )
-            transcript_chunks = []
-            for index, segment in enumerate(wav_segments, start=1):
-                logging.info("Transcribing chunk %s/%s.", index, total_chunks)
-                transcript_chunks.append(self.transcribe(segment))
-
-            full_transcript = " ".join(chunk.strip() for chunk in transcript_chunks if chunk).strip()
-            logging.info(
-                "Chunked transcription complete (chunk_seconds=%s, total_chunks=%s, transcript_chars=%s).",
-                chosen_chunk_seconds,
-                total_chunks,
-                len(full_transcript),
-            )
-            return full_transcript
+            for index, text in self.transcribe_chunked_iter(filepath, chunk_seconds=chosen_chunk_seconds):
+                transcript_chunks[index] = text
         except Exception as e:
+            if not transcript_chunks:
+                # The iterator already fell back to a single call before yielding; that call failed.
+                raise
             logging.warning(
                 "Chunked transcription failed (%s). Falling back to single transcription call.",
                 e,
             )
-            full_transcript = self.transcribe_raw(filepath)
-            logging.info(
-                "Fallback transcription complete (chunk_seconds=%s, total_chunks=%s, transcript_chars=%s).",
-                chosen_chunk_seconds,
-                1,
-                len(full_transcript),
-            )
-            return full_transcript
-        finally:
-            if temp_wav_path and os.path.exists(temp_wav_path):
-                os.remove(temp_wav_path)
+            return self._transcribe_fallback(filepath, chosen_chunk_seconds)
+
+        full_transcript = " ".join(
+            transcript_chunks[index].strip()
+            for index in sorted(transcript_chunks)
+            if transcript_chunks[index]
+        ).strip()
+        logging.info(
+            "Chunked transcription complete (chunk_seconds=%s, total_chunks=%s, transcript_chars=%s).",
+            chosen_chunk_seconds,
+            len(transcript_chunks),
+            len(full_transcript),
+        )
+        return full_transcript
 
 
 if __name__ == "__main__":
@@ -1,45 +1,107 @@
+import collections
+import hashlib
+import os
+import threading
+import time
+from typing import Optional
+
+import diskcache
 import tiktoken
-from openai import OpenAI, RateLimitError
 
+from .openai_client import get_openai_client
 from .openai_decorator import retry_on_openai_errors
 
+DIARIZATION_PROMPT = """Perform speaker diarization on the given text to identify and extract conversations involving multiple speakers. Present the dialogue in the following structured format:
+        Speaker 1:
+        Speaker 2:
+        Speaker 3:
+        ..."""
+
+# Number of dialogues kept in memory in front of the disk cache
+MEMORY_CACHE_SIZE = 128
+
+# Per-message formatting overhead of the chat completion format
+TOKENS_PER_MESSAGE = 4
+
 
 class AI:
     def __init__(
         self,
-        encoding_model: str = "cl100k_base",
+        encoding_model: Optional[str] = None,
         openai_model: str = "gpt-4o-mini",
+        cache_dir: str = "~/.cache/gpt-diar",
+        cache_ttl: int = 7 * 24 * 60 * 60,
     ):
         """
         Initialize an AI instance.
 
         Parameters:
-            encoding_model (str): The name of the encoding model to be used.
+            encoding_model (str): The name of the encoding model to be used (optional, defaults to the encoding of openai_model).
             openai_model (str): The name of the OpenAI model to be used.
+            cache_dir (str): Directory of the on-disk dialogue cache.
+            cache_ttl (int): Lifetime of cached dialogues in seconds.
         """
-        self.tt_encoding = tiktoken.get_encoding(encoding_model)
+        if encoding_model:
+            self.tt_encoding = tiktoken.get_encoding(encoding_model)
+        else:
+            # gpt-4o models use o200k_base; counting with another encoding skews the token budget.
+            try:
+                self.tt_encoding = tiktoken.encoding_for_model(openai_model)
+            except KeyError:
+                # Models newer than this tiktoken release are not mapped; current ones use o200k_base.
+                self.tt_encoding = tiktoken.get_encoding("o200k_base")
         self.openai_model = openai_model
-        self.client = OpenAI()
+        self._prompt_token_count = self.token_counter(DIARIZATION_PROMPT)
+        # Prompt plus the framing of the system and user messages and the reply primer.
+        self._fixed_overhead_tokens = self._prompt_token_count + (2 * TOKENS_PER_MESSAGE) + 3
+        self.client = get_openai_client()
+        self.cache = diskcache.Cache(
+            os.path.expanduser(os.getenv("DIALOGUE_CACHE_DIR", cache_dir))
+        )
+        self.cache_ttl = int(os.getenv("DIALOGUE_CACHE_TTL", cache_ttl))
+        # In-process LRU layer in front of the disk cache: key -> (expiry time, dialogue).
+        self._memory_cache = collections.OrderedDict()
+        self._memory_cache_lock = threading.Lock()
 
     def token_counter(self, passage):
         """
         Count the number of tokens in a given passage.
 
+        Special tokens are not recognized, so the passage is counted as plain text.
+
         Parameters:
             passage (str): The input text passage.
 
         Returns:
             int: The total number of tokens in the passage.
         """
-        tokens = self.tt_encoding.encode(passage)
+        tokens = self.tt_encoding.encode_ordinary(passage)
         total_tokens = len(tokens)
         return total_tokens
 
+    def token_counts(self, passages, num_threads=8):
+        """
+        Count the number of tokens in several passages at once.
+
+        tiktoken encodes the batch on a thread pool, so large batches scale with cores.
+
+        Parameters:
+            passages (list): The input text passages.
+            num_threads (int): Number of encoding threads.
+
+        Returns:
+            list: The total number of tokens in each passage.
+        """
+        batch = self.tt_encoding.encode_ordinary_batch(passages, num_threads=num_threads)
+        return [len(tokens) for tokens in batch]
+
     @retry_on_openai_errors(max_retry=7)
     def extract_dialogue(self, transcript, history=None):
         """
         Extract dialogue involving multiple speaker from text.
 
+        Results for the same model and transcript are cached, unless a history is given.
+
         Parameters:
             transcript (str): The text containing the conversation.
             history (list): List of message history (optional).
@@ -47,41 +109,88 @@ class AI:
         Returns:
             str: Extracted dialogue in the specified format.
         """
-        prompt = """Perform speaker diarization on the given text to identify and extract conversations involving multiple speakers. Present the dialogue in the following structured format:
-        Speaker 1:
-        Speaker 2:
-        Speaker 3:
-        ..."""
+        if history:
+            # The answer depends on the conversation so far, so it is not cached.
+            return self._request_dialogue(transcript, history)
+        return self._cached_dialogue(transcript)
 
-        while True:
-            try:
-                if history:
-                    messages = list(history)
-                else:
-                    messages = [
-                        {"role": "system", "content": prompt},
-                    ]
-                user_message = {"role": "user",
-                                "content": transcript.replace('\n', '')}
-                messages.append(user_message)
-                tokens_per_message = 4
-                prompt_tokens = self.token_counter(prompt)
-                transcript_tokens = self.token_counter(transcript)
-                overhead_tokens = (len(messages) * tokens_per_message) + 3
-                available_tokens = 8191 - (prompt_tokens + transcript_tokens + overhead_tokens)
-                max_token = max(1, min(4096, available_tokens))
-                response = self.client.chat.completions.create(
-                    model=self.openai_model,
-                    messages=messages,
-                    max_tokens=max_token,
-                    temperature=1,
-                    top_p=1,
-                    presence_penalty=0,
-                    frequency_penalty=0,
-                )
-                bot_response = response.choices[0].message.content.strip()
-                return bot_response
-
-            except RateLimitError:
-                messages.pop(1)
-                continue
+    def _cached_dialogue(self, transcript):
+        """
+        Get the dialogue for a transcript from the memory or disk cache, requesting it on a miss.
+
+        Entries in memory expire with the disk entry they were read from, so the TTL holds in both layers.
+
+        Parameters:
+            transcript (str): The text containing the conversation.
+
+        Returns:
+            str: Extracted dialogue in the specified format.
+        """
+        key = hashlib.sha256(
+            f"{self.openai_model}|{DIARIZATION_PROMPT}|{transcript}".encode()
+        ).hexdigest()
+        with self._memory_cache_lock:
+            entry = self._memory_cache.get(key)
+            if entry is not None and entry[0] > time.time():
+                self._memory_cache.move_to_end(key)
+                return entry[1]
+
+        dialogue, expire_time = self.cache.get(key, expire_time=True)
+        if dialogue is None:
+            dialogue = self._request_dialogue(transcript)
+            self.cache.set(key, dialogue, expire=self.cache_ttl)
+            expire_time = time.time() + self.cache_ttl
+
+        with self._memory_cache_lock:
+            self._memory_cache[key] = (expire_time if expire_time is not None else float("inf"), dialogue)
+            self._memory_cache.move_to_end(key)
+            if len(self._memory_cache) > MEMORY_CACHE_SIZE:
+                self._memory_cache.popitem(last=False)
+        return dialogue
+
+    def _request_dialogue(self, transcript, history=None):
+        """
+        Request the speaker diarization of a transcript from the OpenAI API.
+
+        Parameters:
+            transcript (str): The text containing the conversation.
+            history (list): List of message history (optional).
+
+        Returns:
+            str: Extracted dialogue in the specified format.
+        """
+        user_message = {"role": "user",
+                        "content": transcript.replace('\n', '')}
+        transcript_tokens = self.token_counter(transcript)
+
+        if not history:
+            messages = [
+                {"role": "system", "content": DIARIZATION_PROMPT},
+                user_message,
+            ]
+            available_tokens = 8191 - (self._fixed_overhead_tokens + transcript_tokens)
+        else:
+            messages = list(history)
+            messages.append(user_message)
+            history_tokens = [self.token_counter(message["content"]) for message in messages[:-1]]
+            overhead_tokens = (len(messages) * TOKENS_PER_MESSAGE) + 3
+            available_tokens = 8191 - (transcript_tokens + sum(history_tokens) + overhead_tokens)
+            # Drop the oldest history turns up front if they leave no room for the answer.
+            # A leading system message is kept.
+            first_prunable = 1 if messages[0]["role"] == "system" else 0
+            while available_tokens <= 0 and len(history_tokens) > first_prunable:
+                messages.pop(first_prunable)
+                available_tokens += history_tokens.pop(first_prunable) + TOKENS_PER_MESSAGE
+
+        max_token = max(1, min(4096, available_tokens))
+        response = self.client.chat.completions.create(
+            model=self.openai_model,
+            messages=messages,
+            max_tokens=max_token,
+            temperature=1,
+            top_p=1,
+            presence_penalty=0,
+            frequency_penalty=0,
+        )
+        bot_response = response.choices[0].message.content.strip()
+        return bot_response
@@ -1,7 +1,13 @@
 import os
+import shutil
 import subprocess
 import uuid
 
+import soundfile as sf
+
+# Uploads in this format are used as they are; anything else is converted with ffmpeg.
+TARGET_SAMPLE_RATE = 16000
+
 
 def get_project_root():
     """
@@ -26,20 +32,47 @@ def get_file_size_in_mb(file_bytes):
     return size_in_mb
 
 
-def write_audio(audio_bytes, filename):
+def _is_target_format(path):
+    """
+    Check whether an audio file is already 16 kHz mono 16-bit PCM WAV.
+
+    :param path: Path to the audio file.
+    :return: True if the file needs no conversion.
+    """
+    try:
+        info = sf.info(path)
+    except RuntimeError:
+        return False
+    return (
+        info.format == 'WAV'
+        and info.subtype == 'PCM_16'
+        and info.samplerate == TARGET_SAMPLE_RATE
+        and info.channels == 1
+    )
+
+
+def write_audio(audio_stream, filename):
     """
-    Write audio bytes to a temporary file, convert it to a specific format, and return the saved path.
+    Stream audio to a temporary file, convert it to a specific format, and return the saved path.
+
+    Uploads that are already 16 kHz mono 16-bit PCM WAV are kept as they are.
 
-    :param audio_bytes: Bytes containing audio data.
+    :param audio_stream: Readable binary file object containing audio data.
     :param filename: Original filename with extension.
     :return: Path to the saved audio file.
     """
     root_path = get_project_root()
-    temp_wav_path = f"{root_path}/resources/audios/{filename}"
-    save_path = f"{root_path}/resources/audios/{str(uuid.uuid4())}.mp3"
+    temp_wav_path = f"{root_path}/resources/audios/{str(uuid.uuid4())}-{os.path.basename(filename)}"
     with open(temp_wav_path, 'wb') as f:
-        f.write(audio_bytes)
+        shutil.copyfileobj(audio_stream, f, 1 << 20)
+
+    if _is_target_format(temp_wav_path):
+        save_path = f"{root_path}/resources/audios/{str(uuid.uuid4())}.wav"
+        os.replace(temp_wav_path, save_path)
+        return save_path
+
+    save_path = f"{root_path}/resources/audios/{str(uuid.uuid4())}.mp3"
     subprocess.run(["ffmpeg", "-i", temp_wav_path, "-ar",
-                    "16000", "-ac", "1", "-y", save_path])
+                    str(TARGET_SAMPLE_RATE), "-ac", "1", "-y", save_path])
     os.remove(temp_wav_path)
     return save_path
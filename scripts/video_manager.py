@@ -1,5 +1,8 @@
+import hashlib
+import logging
 import os
 import subprocess
+import uuid
 
 import yt_dlp as youtube_dl
 
@@ -7,49 +10,110 @@ from .utils import get_project_root
 
 
 class VideoDownloader:
-    def __init__(self):
+    def __init__(self, sample_rate: int = 16000, cache_max_mb: int = 2048):
         """
         Initialize the VideoDownloader class.
+
+        Args:
+            sample_rate (int): Sample rate of the extracted audio.
+            cache_max_mb (int): Size budget of the extracted audio cache in megabytes.
         """
         self.root_path = get_project_root()
         self.output_path = os.path.join(self.root_path, "resources/videos")
         self.audio_output_path = os.path.join(
             self.root_path, "resources/audios")
+        self.sample_rate = sample_rate
+        self.cache_path = os.path.join(self.audio_output_path, "youtube_cache")
+        self.cache_max_bytes = int(os.getenv("YOUTUBE_CACHE_MAX_MB", cache_max_mb)) * 1024 * 1024
         self.ydl_opts = {
             'format': 'bestvideo+bestaudio/best',
             'outtmpl': os.path.join(self.output_path, '%(title)s.%(ext)s'),
             'extractor_lazy': True,
         }
 
+    def _cached_audio_path(self, video_id):
+        """
+        Get the cache path of the extracted audio for a video.
+
+        The name is a hash of the video ID and sample rate, so user input never reaches the filesystem path.
+
+        Args:
+            video_id (str): The YouTube video ID.
+        """
+        key = hashlib.sha256(f"{video_id}:{self.sample_rate}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_path, f"{key}.mp3")
+
+    def _evict_cache(self, keep_path):
+        """
+        Remove the least recently used cached audio files until the cache fits its size budget.
+
+        Args:
+            keep_path (str): Path that must not be evicted.
+        """
+        entries = []
+        for name in os.listdir(self.cache_path):
+            path = os.path.join(self.cache_path, name)
+            if name.endswith(".part.mp3") or not name.endswith(".mp3"):
+                continue
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                # Another worker evicted it after the listing.
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total_bytes = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total_bytes <= self.cache_max_bytes:
+                break
+            if path == keep_path:
+                continue
+            try:
+                os.remove(path)
+                logging.info("Evicted cached audio %s.", path)
+            except FileNotFoundError:
+                pass
+            total_bytes -= size
+
     def download_video(self, video_id):
         """
         Download a video from the provided URL and convert to audio.
 
+        Extracted audio is cached per video ID, so repeated requests skip yt-dlp and ffmpeg.
+
         Args:
-            video_url (str): The URL of the video to be downloaded and converted.
+            video_id (str): The ID of the YouTube video to be downloaded and converted.
         """
+        audio_output_path = self._cached_audio_path(video_id)
+        try:
+            # Refresh the mtime so eviction treats this entry as recently used.
+            os.utime(audio_output_path)
+            return audio_output_path
+        except FileNotFoundError:
+            # Not cached, or evicted by another worker since: download it again.
+            pass
+
         with youtube_dl.YoutubeDL(self.ydl_opts) as ydl:
             info_dict = ydl.extract_info(
                 f"https://www.youtube.com/watch?v={video_id}", download=True)
             video_path = os.path.join(
                 self.output_path, ydl.prepare_filename(info_dict))
 
-            # Check if the downloaded file is a video
-            mime_type = subprocess.check_output(
-                ["file", "-b", "--mime-type", video_path]).decode("utf-8").strip()
-            if mime_type.startswith("video/"):
-                # Get the video file name without the extension
-                video_name_no_extension = os.path.splitext(
-                    os.path.basename(video_path))[0]
-
-                # Run ffmpeg command to convert the video to audio
-                audio_output_path = os.path.join(
-                    self.audio_output_path, f"{video_name_no_extension}.mp3")
-                subprocess.run(["ffmpeg", "-i", video_path, "-ar",
-                               "16000", "-ac", "1", "-y" ,audio_output_path])
-
-                print(f"Converted {video_name_no_extension}.mp3")
-                return audio_output_path
+        # Convert into a temporary file and rename it into place, so a partial
+        # conversion is never served from the cache.
+        os.makedirs(self.cache_path, exist_ok=True)
+        temp_audio_path = f"{audio_output_path}.{uuid.uuid4()}.part.mp3"
+        try:
+            subprocess.run(["ffmpeg", "-i", video_path, "-ar",
+                           str(self.sample_rate), "-ac", "1", "-y", temp_audio_path], check=True)
+            os.replace(temp_audio_path, audio_output_path)
+        finally:
+            if os.path.exists(temp_audio_path):
+                os.remove(temp_audio_path)
+
+        print(f"Converted {video_id} to {audio_output_path}")
+        self._evict_cache(keep_path=audio_output_path)
+        return audio_output_path
 
 
 if __name__ == "__main__":
@@ -0,0 +1,62 @@
+import threading
+import unittest
+
+import numpy as np
+
+from scripts.batch_scheduler import BatchScheduler
+
+
+class BatchSchedulerTests(unittest.TestCase):
+    def test_segments_are_batched_by_duration_bucket(self):
+        batches = []
+        lock = threading.Lock()
+
+        def transcribe_batch(segments):
+            with lock:
+                batches.append([len(segment) for segment in segments])
+            return [f"len{len(segment)}" for segment in segments]
+
+        scheduler = BatchScheduler(transcribe_batch, sample_rate=10, max_batch=2, max_wait_ms=10_000)
+        short_a = np.zeros(50)
+        long_a = np.zeros(500)
+        short_b = np.zeros(60)
+        long_b = np.zeros(600)
+
+        futures = [scheduler.submit(segment) for segment in (short_a, long_a, short_b, long_b)]
+
+        self.assertEqual([future.result(timeout=5) for future in futures], ["len50", "len500", "len60", "len600"])
+        self.assertCountEqual(batches, [[50, 60], [500, 600]])
+
+    def test_partial_batch_is_flushed_after_max_wait(self):
+        scheduler = BatchScheduler(lambda segments: ["text"] * len(segments), max_batch=8, max_wait_ms=10)
+
+        self.assertEqual(scheduler.submit(np.zeros(160)).result(timeout=5), "text")
+
+    def test_batch_errors_are_propagated_to_every_future(self):
+        def transcribe_batch(_segments):
+            raise RuntimeError("model failed")
+
+        scheduler = BatchScheduler(transcribe_batch, max_batch=2)
+        futures = [scheduler.submit(np.zeros(160)) for _ in range(2)]
+
+        for future in futures:
+            with self.assertRaises(RuntimeError):
+                future.result(timeout=5)
+
+    def test_cancelled_segments_are_not_transcribed(self):
+        batches = []
+        scheduler = BatchScheduler(
+            lambda segments: batches.append(len(segments)) or ["text"] * len(segments),
+            max_batch=8,
+            max_wait_ms=50,
+        )
+        cancelled = scheduler.submit(np.zeros(160))
+        kept = scheduler.submit(np.zeros(160))
+
+        self.assertTrue(cancelled.cancel())
+        self.assertEqual(kept.result(timeout=5), "text")
+        self.assertEqual(batches, [1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,247 @@
+import os
+import tempfile
+import threading
+import time
+import unittest
+from concurrent.futures import Future
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import soundfile as sf
+
+from scripts import speech_to_text
+from scripts.speech_to_text import Whisper
+
+
+class ChunkedTranscriptionTests(unittest.TestCase):
+    def setUp(self):
+        with patch.object(speech_to_text, "get_openai_client"):
+            self.whisper = Whisper(max_workers=4)
+
+    @patch.object(Whisper, "_load_mono_16k", return_value=np.zeros(10, dtype=np.int16))
+    @patch.object(Whisper, "audio_process")
+    def test_transcribe_chunked_runs_chunks_concurrently_in_order(self, mock_audio_process, _mock_load):
+        mock_audio_process.return_value = [np.full(10, index, dtype=np.int16) for index in range(4)]
+        barrier = threading.Barrier(4, timeout=5)
+
+        def fake_transcribe(segment):
+            barrier.wait()
+            # Finish in reverse order to make sure results keep chunk order.
+            time.sleep(0.01 * (4 - int(segment[0])))
+            return f"chunk{int(segment[0])}"
+
+        with patch.object(self.whisper, "transcribe", side_effect=fake_transcribe):
+            transcript = self.whisper.transcribe_chunked("/tmp/input.mp3", chunk_seconds=30)
+
+        self.assertEqual(transcript, "chunk0 chunk1 chunk2 chunk3")
+
+    @patch.object(Whisper, "_load_mono_16k", return_value=np.zeros(10, dtype=np.int16))
+    @patch.object(Whisper, "audio_process")
+    def test_transcribe_chunked_falls_back_when_a_chunk_fails(self, mock_audio_process, _mock_load):
+        mock_audio_process.return_value = [np.zeros(10, dtype=np.int16)] * 2
+
+        with patch.object(self.whisper, "transcribe", side_effect=RuntimeError("upload failed")), \
+                patch.object(self.whisper, "transcribe_raw", return_value="raw transcript") as mock_raw:
+            transcript = self.whisper.transcribe_chunked("/tmp/input.mp3", chunk_seconds=30)
+
+        self.assertEqual(transcript, "raw transcript")
+        mock_raw.assert_called_once_with("/tmp/input.mp3")
+
+    @patch.object(Whisper, "_load_mono_16k", side_effect=RuntimeError("decode failed"))
+    def test_transcribe_chunked_does_not_repeat_a_failed_fallback(self, _mock_load):
+        with patch.object(self.whisper, "transcribe_raw", side_effect=RuntimeError("upload failed")) as mock_raw:
+            with self.assertRaises(RuntimeError):
+                self.whisper.transcribe_chunked("/tmp/input.mp3", chunk_seconds=30)
+
+        mock_raw.assert_called_once_with("/tmp/input.mp3")
+
+    @patch.object(Whisper, "_load_mono_16k", return_value=np.zeros(10, dtype=np.int16))
+    @patch.object(Whisper, "audio_process")
+    def test_transcribe_chunked_cancels_queued_chunks_before_falling_back(self, mock_audio_process, _mock_load):
+        mock_audio_process.return_value = [np.full(10, index, dtype=np.int16) for index in range(4)]
+        self.whisper.max_workers = 1
+        uploaded = []
+        release = threading.Event()
+
+        def fake_transcribe(segment):
+            uploaded.append(int(segment[0]))
+            if segment[0]:
+                # Hold later uploads until the fallback starts.
+                release.wait(5)
+            raise RuntimeError("upload failed")
+
+        def fake_transcribe_raw(_filepath):
+            release.set()
+            return "raw transcript"
+
+        with patch.object(self.whisper, "transcribe", side_effect=fake_transcribe), \
+                patch.object(self.whisper, "transcribe_raw", side_effect=fake_transcribe_raw):
+            transcript = self.whisper.transcribe_chunked("/tmp/input.mp3", chunk_seconds=30)
+
+        self.assertEqual(transcript, "raw transcript")
+        self.assertLessEqual(set(uploaded), {0, 1})
+
+    @patch.object(Whisper, "_load_mono_16k", return_value=np.zeros(10, dtype=np.int16))
+    def test_transcribe_single_pass_falls_back_when_local_model_fails(self, _mock_load):
+        failed = Future()
+        failed.set_exception(RuntimeError("out of memory"))
+        self.whisper.scheduler = MagicMock()
+        self.whisper.scheduler.submit.return_value = failed
+
+        with patch.object(self.whisper, "transcribe_raw", return_value="raw transcript") as mock_raw:
+            transcript = self.whisper.transcribe_single_pass("/tmp/input.mp3")
+
+        self.assertEqual(transcript, "raw transcript")
+        mock_raw.assert_called_once_with("/tmp/input.mp3")
+
+    def test_local_model_requires_faster_whisper_1_2(self):
+        fake_faster_whisper = SimpleNamespace(
+            __version__="1.1.1", BatchedInferencePipeline=MagicMock(), WhisperModel=MagicMock()
+        )
+
+        with patch.dict("sys.modules", {"faster_whisper": fake_faster_whisper}):
+            with self.assertRaisesRegex(RuntimeError, "faster-whisper>=1.2"):
+                Whisper._load_local_model("large-v3")
+
+        fake_faster_whisper.WhisperModel.assert_not_called()
+
+    def test_audio_process_returns_int16_speech_segments(self):
+        sr = self.whisper.whisper_sample_rate
+        rng = np.random.default_rng(0)
+        silence = np.zeros(sr, dtype=np.int16)
+        speech = (rng.standard_normal(2 * sr) * 8000).astype(np.int16)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wav_path = os.path.join(tmp_dir, "speech.wav")
+            sf.write(wav_path, np.concatenate([silence, speech, silence]), sr, subtype='PCM_16')
+
+            segments = self.whisper.audio_process(wav_path, chunk_seconds=30)
+
+        self.assertEqual(len(segments), 1)
+        self.assertEqual(segments[0].dtype, np.int16)
+        self.assertAlmostEqual(len(segments[0]) / sr, 2.0, delta=0.4)
+
+    def test_audio_process_drops_short_and_empty_regions(self):
+        wav = np.arange(16000, dtype=np.int16)
+        regions = [(0, 100), (1000, 9000), (20000, 30000)]
+
+        with patch.object(self.whisper, "vad_webrtc", return_value=regions):
+            segments = self.whisper.audio_process(wav, chunk_seconds=30)
+
+        self.assertEqual(len(segments), 1)
+        np.testing.assert_array_equal(segments[0], wav[1000:9000])
+        self.assertTrue(np.shares_memory(segments[0], wav))
+
+    def test_vad_webrtc_splits_regions_longer_than_chunk_seconds(self):
+        sr = self.whisper.whisper_sample_rate
+        rng = np.random.default_rng(0)
+        speech = (rng.standard_normal(25 * sr) * 8000).astype(np.int16)
+        wav = np.concatenate([np.zeros(sr, dtype=np.int16), speech])
+
+        regions = self.whisper.vad_webrtc(wav, sr, chunk_seconds=10)
+
+        self.assertEqual(len(regions), 3)
+        self.assertAlmostEqual(regions[0][0] / sr, 1.0, delta=0.1)
+        self.assertEqual([end - start for start, end in regions[:2]], [10 * sr, 10 * sr])
+
+    def test_load_mono_16k_downmixes_and_resamples_in_process(self):
+        stereo = np.zeros((44100, 2), dtype=np.float32)
+        stereo[:, 0] = 0.5
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wav_path = os.path.join(tmp_dir, "stereo.wav")
+            sf.write(wav_path, stereo, 44100)
+
+            with patch.object(speech_to_text.subprocess, "run") as mock_run:
+                wav = self.whisper._load_mono_16k(wav_path)
+
+        mock_run.assert_not_called()
+        self.assertEqual(wav.dtype, np.int16)
+        self.assertAlmostEqual(len(wav), self.whisper.whisper_sample_rate, delta=10)
+        self.assertAlmostEqual(int(np.median(wav)), 8191, delta=50)
+
+    def test_load_mono_16k_reads_compliant_wav_without_conversion(self):
+        sr = self.whisper.whisper_sample_rate
+        samples = np.arange(-800, 800, dtype=np.int16)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            wav_path = os.path.join(tmp_dir, "mono16k.wav")
+            sf.write(wav_path, samples, sr, subtype='PCM_16')
+
+            with patch.object(speech_to_text.soxr, "resample") as mock_resample:
+                wav = self.whisper._load_mono_16k(wav_path)
+
+        mock_resample.assert_not_called()
+        np.testing.assert_array_equal(wav, samples)
+
+    def test_load_mono_16k_falls_back_to_ffmpeg_when_read_fails(self):
+        info = SimpleNamespace(samplerate=44100, channels=2, subtype='MPEG_LAYER_III')
+        decoded = np.zeros(10, dtype=np.int16)
+
+        with patch.object(speech_to_text, "_probe_audio", return_value=info), \
+                patch.object(speech_to_text.os.path, "getmtime", return_value=0.0), \
+                patch.object(speech_to_text.sf, "read", side_effect=RuntimeError("truncated")), \
+                patch.object(self.whisper, "_decode_with_ffmpeg", return_value=decoded) as mock_ffmpeg:
+            wav = self.whisper._load_mono_16k("/tmp/truncated.mp3")
+
+        self.assertIs(wav, decoded)
+        mock_ffmpeg.assert_called_once_with("/tmp/truncated.mp3")
+
+    def test_transcribe_uploads_in_memory_wav(self):
+        self.whisper.upload_format = "wav"
+        self.whisper.client.audio.transcriptions.create.return_value = SimpleNamespace(text="hello")
+
+        with patch.object(speech_to_text.os, "remove") as mock_remove:
+            text = self.whisper.transcribe(np.zeros(1600, dtype=np.int16))
+
+        self.assertEqual(text, "hello")
+        mock_remove.assert_not_called()
+        _, kwargs = self.whisper.client.audio.transcriptions.create.call_args
+        filename, payload, content_type = kwargs["file"]
+        self.assertEqual((filename, content_type), ("chunk.wav", "audio/wav"))
+        self.assertTrue(payload.startswith(b"RIFF"))
+
+    def test_transcribe_uploads_opus_encoded_by_ffmpeg(self):
+        self.whisper.client.audio.transcriptions.create.return_value = SimpleNamespace(text="hello")
+        segment = np.arange(1600, dtype=np.int16)
+
+        with patch.object(speech_to_text.subprocess, "run", return_value=SimpleNamespace(stdout=b"OggS")) as mock_run:
+            self.whisper.transcribe(segment)
+
+        self.assertEqual(mock_run.call_args.kwargs["input"], segment.tobytes())
+        self.assertIn("libopus", mock_run.call_args.args[0])
+        _, kwargs = self.whisper.client.audio.transcriptions.create.call_args
+        self.assertEqual(kwargs["file"], ("chunk.ogg", b"OggS", "audio/ogg"))
+
+    def test_transcribe_falls_back_to_wav_without_ffmpeg(self):
+        self.whisper.client.audio.transcriptions.create.return_value = SimpleNamespace(text="hello")
+
+        with patch.object(speech_to_text.subprocess, "run", side_effect=FileNotFoundError("ffmpeg")):
+            self.whisper.transcribe(np.zeros(1600, dtype=np.int16))
+
+        _, kwargs = self.whisper.client.audio.transcriptions.create.call_args
+        self.assertEqual(kwargs["file"][0], "chunk.wav")
+
+    def test_transcribe_local_maps_batched_output_back_to_segments(self):
+        sr = self.whisper.whisper_sample_rate
+        self.whisper.local_model = MagicMock()
+        self.whisper.local_model.transcribe.return_value = (
+            iter([
+                SimpleNamespace(start=0.0, text=" first"),
+                SimpleNamespace(start=2.0, text=" second"),
+                SimpleNamespace(start=32.0, text=" third"),
+            ]),
+            None,
+        )
+        segments = [np.zeros(2 * sr, dtype=np.int16), np.zeros(40 * sr, dtype=np.int16)]
+
+        texts = self.whisper.transcribe_local(segments)
+
+        self.assertEqual(texts, ["first", "second third"])
+        _, kwargs = self.whisper.local_model.transcribe.call_args
+        self.assertEqual(
+            kwargs["clip_timestamps"],
+            [{"start": 0.0, "end": 2.0}, {"start": 2.0, "end": 32.0}, {"start": 32.0, "end": 42.0}],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import tempfile
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock, call, patch
+
+from scripts import text_analysis
+from scripts.text_analysis import AI
+
+
+def _completion(content):
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+
+class DialogueExtractionTests(unittest.TestCase):
+    def setUp(self):
+        self.cache_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(self.cache_dir.cleanup)
+        encoding = MagicMock()
+        encoding.encode_ordinary.side_effect = lambda text: text.split()
+        with patch.object(text_analysis.tiktoken, "encoding_for_model", return_value=encoding), \
+                patch.object(text_analysis, "get_openai_client"):
+            self.ai = AI(cache_dir=self.cache_dir.name)
+        self.addCleanup(self.ai.cache.close)
+        self.create = self.ai.client.chat.completions.create
+        self.create.return_value = _completion("Speaker 1: hello")
+
+    def test_repeated_transcript_is_served_from_cache(self):
+        first = self.ai.extract_dialogue("hello there")
+        second = self.ai.extract_dialogue("hello there")
+
+        self.assertEqual(first, "Speaker 1: hello")
+        self.assertEqual(second, "Speaker 1: hello")
+        self.create.assert_called_once()
+
+    def test_disk_cache_is_shared_between_instances(self):
+        self.ai.extract_dialogue("hello there")
+        with patch.object(text_analysis.tiktoken, "encoding_for_model"), patch.object(text_analysis, "get_openai_client"):
+            other = AI(cache_dir=self.cache_dir.name)
+        self.addCleanup(other.cache.close)
+
+        self.assertEqual(other.extract_dialogue("hello there"), "Speaker 1: hello")
+        other.client.chat.completions.create.assert_not_called()
+
+    def test_memory_cache_honours_ttl(self):
+        self.ai.cache_ttl = 60
+        with patch.object(text_analysis.time, "time", return_value=1_000.0):
+            self.ai.extract_dialogue("hello there")
+        self.ai.cache.clear()
+        self.create.return_value = _completion("Speaker 1: hi")
+
+        with patch.object(text_analysis.time, "time", return_value=1_030.0):
+            fresh = self.ai.extract_dialogue("hello there")
+        with patch.object(text_analysis.time, "time", return_value=1_061.0):
+            expired = self.ai.extract_dialogue("hello there")
+
+        self.assertEqual(fresh, "Speaker 1: hello")
+        self.assertEqual(expired, "Speaker 1: hi")
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_history_bypasses_cache(self):
+        history = [{"role": "system", "content": "prompt"}]
+
+        self.ai.extract_dialogue("hello there", history=history)
+        self.ai.extract_dialogue("hello there", history=history)
+
+        self.assertEqual(self.create.call_count, 2)
+
+    def test_prompt_is_tokenized_once(self):
+        encoding = self.ai.tt_encoding
+        encoding.encode_ordinary.reset_mock()
+
+        self.ai.extract_dialogue("hello there")
+        self.ai.extract_dialogue("general kenobi", history=[{"role": "system", "content": "prompt"}])
+
+        # History messages are counted as given; the built-in prompt is not encoded again.
+        self.assertEqual(
+            encoding.encode_ordinary.call_args_list,
+            [call("hello there"), call("general kenobi"), call("prompt")],
+        )
+        encoding.encode.assert_not_called()
+
+    def test_max_tokens_leaves_room_for_prompt_and_transcript(self):
+        transcript = "word " * 5000
+        prompt_tokens = len(text_analysis.DIARIZATION_PROMPT.split())
+
+        self.ai.extract_dialogue(transcript)
+
+        self.assertEqual(self.create.call_args.kwargs["max_tokens"], 8191 - (prompt_tokens + 2 * 4 + 3 + 5000))
+
+    def test_history_is_pruned_when_it_leaves_no_room(self):
+        history = [
+            {"role": "system", "content": "prompt"},
+            {"role": "user", "content": "old " * 9000},
+            {"role": "assistant", "content": "recent answer"},
+        ]
+
+        self.ai.extract_dialogue("hello there", history=history)
+
+        messages = self.create.call_args.kwargs["messages"]
+        self.assertEqual([message["content"] for message in messages], ["prompt", "recent answer", "hello there"])
+        self.assertGreater(self.create.call_args.kwargs["max_tokens"], 1)
+        self.assertEqual(len(history), 3)
+
+    def test_history_budget_counts_its_own_system_message(self):
+        history = [{"role": "system", "content": "custom prompt " * 100}]
+
+        self.ai.extract_dialogue("hello there", history=history)
+
+        self.assertEqual(self.create.call_args.kwargs["max_tokens"], 4096)
+        history[0]["content"] = "custom prompt " * 3000
+
+        self.ai.extract_dialogue("hello there", history=history)
+
+        self.assertEqual(self.create.call_args.kwargs["max_tokens"], 8191 - (6000 + 2 + 2 * 4 + 3))
+
+    def test_history_without_system_message_prunes_from_the_start(self):
+        history = [
+            {"role": "user", "content": "old " * 9000},
+            {"role": "assistant", "content": "recent answer"},
+        ]
+
+        self.ai.extract_dialogue("hello there", history=history)
+
+        messages = self.create.call_args.kwargs["messages"]
+        self.assertEqual([message["content"] for message in messages], ["recent answer", "hello there"])
+
+    def test_default_encoding_matches_openai_model(self):
+        with patch.object(text_analysis.tiktoken, "encoding_for_model") as mock_for_model, \
+                patch.object(text_analysis, "get_openai_client"):
+            ai = AI(openai_model="gpt-4o-mini", cache_dir=self.cache_dir.name)
+        self.addCleanup(ai.cache.close)
+
+        mock_for_model.assert_called_once_with("gpt-4o-mini")
+        self.assertIs(ai.tt_encoding, mock_for_model.return_value)
+
+    def test_unknown_model_falls_back_to_o200k_encoding(self):
+        with patch.object(text_analysis.tiktoken, "encoding_for_model", side_effect=KeyError("gpt-4.1-mini")), \
+                patch.object(text_analysis.tiktoken, "get_encoding") as mock_get_encoding, \
+                patch.object(text_analysis, "get_openai_client"):
+            ai = AI(openai_model="gpt-4.1-mini", cache_dir=self.cache_dir.name)
+        self.addCleanup(ai.cache.close)
+
+        mock_get_encoding.assert_called_once_with("o200k_base")
+        self.assertIs(ai.tt_encoding, mock_get_encoding.return_value)
+
+    def test_token_counts_uses_batch_encoding(self):
+        self.ai.tt_encoding.encode_ordinary_batch.return_value = [[1, 2], [3]]
+
+        self.assertEqual(self.ai.token_counts(["a b", "c"]), [2, 1])
+        self.ai.tt_encoding.encode_ordinary_batch.assert_called_once_with(["a b", "c"], num_threads=8)
+
+
+if __name__ == "__main__":
+    unittest.main()
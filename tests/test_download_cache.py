@@ -0,0 +1,88 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+from scripts import video_manager
+from scripts.video_manager import VideoDownloader
+
+
+class DownloadCacheTests(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.downloader = VideoDownloader(cache_max_mb=1)
+        self.downloader.cache_path = tmp_dir.name
+
+    def _write_cached(self, path, size, mtime):
+        with open(path, "wb") as f:
+            f.write(b"\0" * size)
+        os.utime(path, (mtime, mtime))
+
+    def test_cached_audio_skips_download(self):
+        cached_path = self.downloader._cached_audio_path("abc123")
+        self._write_cached(cached_path, 10, mtime=1)
+
+        with patch.object(video_manager.youtube_dl, "YoutubeDL") as mock_ydl:
+            audio_path = self.downloader.download_video("abc123")
+
+        self.assertEqual(audio_path, cached_path)
+        mock_ydl.assert_not_called()
+        self.assertGreater(os.path.getmtime(cached_path), 1)
+
+    def test_cache_key_does_not_use_video_id_as_path(self):
+        cached_path = self.downloader._cached_audio_path("../../etc/passwd")
+
+        self.assertEqual(os.path.dirname(cached_path), self.downloader.cache_path)
+
+    def test_evict_cache_removes_least_recently_used_entries(self):
+        half_mb = 512 * 1024
+        oldest = os.path.join(self.downloader.cache_path, "oldest.mp3")
+        middle = os.path.join(self.downloader.cache_path, "middle.mp3")
+        newest = os.path.join(self.downloader.cache_path, "newest.mp3")
+        self._write_cached(oldest, half_mb, mtime=1)
+        self._write_cached(middle, half_mb, mtime=2)
+        self._write_cached(newest, half_mb, mtime=3)
+
+        self.downloader._evict_cache(keep_path=newest)
+
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.exists(middle))
+        self.assertTrue(os.path.exists(newest))
+
+    def test_evict_cache_skips_entries_removed_by_another_worker(self):
+        half_mb = 512 * 1024
+        oldest = os.path.join(self.downloader.cache_path, "oldest.mp3")
+        middle = os.path.join(self.downloader.cache_path, "middle.mp3")
+        newest = os.path.join(self.downloader.cache_path, "newest.mp3")
+        self._write_cached(oldest, half_mb, mtime=1)
+        self._write_cached(middle, half_mb, mtime=2)
+        self._write_cached(newest, half_mb, mtime=3)
+        real_remove = os.remove
+
+        def remove_raced(path):
+            # Another worker deletes the entry first.
+            real_remove(path)
+            raise FileNotFoundError(path)
+
+        with patch.object(video_manager.os, "remove", side_effect=remove_raced):
+            self.downloader._evict_cache(keep_path=newest)
+
+        self.assertFalse(os.path.exists(oldest))
+        self.assertTrue(os.path.exists(middle))
+
+    def test_cache_entry_evicted_before_use_is_downloaded_again(self):
+        with patch.object(video_manager.os, "utime", side_effect=FileNotFoundError), \
+                patch.object(video_manager.youtube_dl, "YoutubeDL") as mock_ydl, \
+                patch.object(video_manager.subprocess, "run"), \
+                patch.object(video_manager.os, "replace"), \
+                patch.object(self.downloader, "_evict_cache"):
+            mock_ydl.return_value.__enter__.return_value.prepare_filename.return_value = "video.mp4"
+            audio_path = self.downloader.download_video("abc123")
+
+        self.assertEqual(audio_path, self.downloader._cached_audio_path("abc123"))
+        mock_ydl.assert_called_once()
+
+
+if __name__ == "__main__":
+    unittest.main()
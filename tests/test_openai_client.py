@@ -0,0 +1,25 @@
+import os
+import unittest
+from unittest.mock import patch
+
+from scripts.openai_client import get_openai_client
+
+
+class SharedOpenAIClientTests(unittest.TestCase):
+    def setUp(self):
+        get_openai_client.cache_clear()
+        self.addCleanup(get_openai_client.cache_clear)
+
+    def test_client_is_shared_and_pooled(self):
+        with patch.dict(os.environ, {"OPENAI_API_KEY": "sk-test"}):
+            first = get_openai_client()
+            second = get_openai_client()
+
+        self.assertIs(first, second)
+        pool = first._client._transport._pool
+        self.assertTrue(pool._http2)
+        self.assertEqual(pool._max_connections, 32)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+import unittest
+from unittest.mock import MagicMock, patch
+
+import httpx
+from openai import BadRequestError, InternalServerError, RateLimitError
+
+from scripts import openai_decorator
+from scripts.openai_decorator import retry_on_openai_errors
+
+
+def _status_error(error_class, status_code, headers=None):
+    request = httpx.Request("POST", "https://api.openai.com/v1/chat/completions")
+    response = httpx.Response(status_code, headers=headers, request=request)
+    return error_class("error", response=response, body=None)
+
+
+class RetryOnOpenAIErrorsTests(unittest.TestCase):
+    def setUp(self):
+        sleep_patcher = patch.object(openai_decorator.time, "sleep")
+        self.mock_sleep = sleep_patcher.start()
+        self.addCleanup(sleep_patcher.stop)
+
+    def test_backoff_is_jittered_and_capped(self):
+        func = MagicMock(side_effect=[_status_error(InternalServerError, 500)] * 6 + ["ok"])
+
+        with patch.object(openai_decorator.random, "uniform", side_effect=lambda low, high: high) as mock_uniform:
+            result = retry_on_openai_errors(max_retry=7, base_delay=1.0, max_delay=10.0)(func)()
+
+        self.assertEqual(result, "ok")
+        self.assertEqual(
+            [call.args for call in mock_uniform.call_args_list],
+            [(0, 2.0), (0, 4.0), (0, 8.0), (0, 10.0), (0, 10.0), (0, 10.0)],
+        )
+
+    def test_rate_limit_honours_retry_after(self):
+        func = MagicMock(side_effect=[_status_error(RateLimitError, 429, {"retry-after": "3"}), "ok"])
+
+        self.assertEqual(retry_on_openai_errors(max_retry=3)(func)(), "ok")
+        self.mock_sleep.assert_called_once_with(3.0)
+
+    def test_bad_request_is_not_retried(self):
+        func = MagicMock(side_effect=_status_error(BadRequestError, 400))
+
+        with self.assertRaises(BadRequestError):
+            retry_on_openai_errors(max_retry=7)(func)()
+
+        func.assert_called_once()
+        self.mock_sleep.assert_not_called()
+
+    def test_gives_up_after_max_retry(self):
+        func = MagicMock(side_effect=_status_error(InternalServerError, 500))
+
+        with self.assertRaises(Exception):
+            retry_on_openai_errors(max_retry=3)(func)()
+
+        self.assertEqual(func.call_count, 3)
+        self.assertEqual(self.mock_sleep.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,103 +1,251 @@
+import asyncio
 import importlib
+import importlib.abc
+import importlib.util
+import json
+import os
+import subprocess
 import sys
 import types
 import unittest
-from unittest.mock import patch
-
-from fastapi import HTTPException
-
-
-# Provide lightweight fakes for app dependencies so tests run offline.
-fake_speech_to_text = types.ModuleType("scripts.speech_to_text")
-
-
-class _FakeWhisper:
-    def __init__(self):
-        self.default_chunk_seconds = 120
-
-    @staticmethod
-    def _clamp_chunk_seconds(value):
-        return max(10, min(600, int(value)))
-
-    def transcribe_single_pass(self, _path):
-        return ""
-
-    def transcribe_chunked(self, _path, chunk_seconds=None):
-        return ""
-
-
-fake_speech_to_text.Whisper = _FakeWhisper
-sys.modules["scripts.speech_to_text"] = fake_speech_to_text
-
-fake_text_analysis = types.ModuleType("scripts.text_analysis")
-
-
-class _FakeAI:
-    def extract_dialogue(self, _text):
-        return []
-
-
-fake_text_analysis.AI = _FakeAI
-sys.modules["scripts.text_analysis"] = fake_text_analysis
-
-fake_video_manager = types.ModuleType("scripts.video_manager")
-
-
-class _FakeVideoDownloader:
-    def download_video(self, _video_id):
-        return "/tmp/video.wav"
-
-
-fake_video_manager.VideoDownloader = _FakeVideoDownloader
-sys.modules["scripts.video_manager"] = fake_video_manager
-
-fake_utils = types.ModuleType("scripts.utils")
-fake_utils.write_audio = lambda _data, _filename: "/tmp/audio.wav"
-sys.modules["scripts.utils"] = fake_utils
-
-app = importlib.import_module("scripts.app")
+from unittest.mock import DEFAULT, MagicMock, call, create_autospec, patch
+
+from scripts.speech_to_text import Whisper
+from scripts.text_analysis import AI
+from scripts.video_manager import VideoDownloader
+
+_AUDIO_PATH = "/tmp/audio.wav"
+_DIALOGUE = ({"speaker": "A", "text": "hello"},)
+_FULL_TRANSCRIPT = "full transcript"
+_CHUNKED_TRANSCRIPT = "chunked transcript"
+
+
+def _whisper_instance():
+    """
+    Mock a Whisper instance with the real method signatures.
+    """
+    whisper = create_autospec(Whisper, instance=True)
+    # Set in Whisper.__init__, so it is not part of the class spec.
+    whisper.default_chunk_seconds = 120
+    return whisper
+
+
+# Factories for the attributes of each faked app dependency, built only when the module is imported.
+_FAKE_ATTRS = {
+    "scripts.speech_to_text": lambda: {"Whisper": MagicMock(return_value=_whisper_instance())},
+    "scripts.text_analysis": lambda: {"AI": MagicMock(return_value=create_autospec(AI, instance=True))},
+    "scripts.video_manager": lambda: {
+        "VideoDownloader": MagicMock(return_value=create_autospec(VideoDownloader, instance=True))
+    },
+    "scripts.utils": lambda: {"write_audio": MagicMock(return_value=_AUDIO_PATH)},
+}
+
+# Modules _import_app added to sys.modules (the fakes, scripts.app and possibly the package itself).
+_INJECTED = []
+
+
+def _fake_module(name, **attrs):
+    """
+    Create a fake module with the given attributes.
+    """
+    module = types.ModuleType(name)
+    module.__dict__.update(attrs)
+    return module
+
+
+class _FakeFinder(importlib.abc.MetaPathFinder, importlib.abc.Loader):
+    """
+    Serve lightweight fakes for app dependencies so tests run offline.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        if fullname in _FAKE_ATTRS:
+            return importlib.util.spec_from_loader(fullname, self)
+        return None
+
+    def create_module(self, spec):
+        return _fake_module(spec.name, **_FAKE_ATTRS[spec.name]())
+
+    def exec_module(self, module):
+        pass
+
+
+def _import_app():
+    """
+    Import scripts.app with its dependencies replaced by fakes.
+    """
+    imported_before = set(sys.modules)
+    # Dependencies already imported by other test modules are set aside so the app binds to the fakes.
+    real_modules = {name: sys.modules.pop(name) for name in _FAKE_ATTRS if name in sys.modules}
+    finder = _FakeFinder()
+    sys.meta_path.insert(0, finder)
+    try:
+        return importlib.import_module("scripts.app")
+    finally:
+        sys.meta_path.remove(finder)
+        sys.modules.update(real_modules)
+        for name, module in real_modules.items():
+            setattr(sys.modules["scripts"], name.rpartition(".")[2], module)
+        injected_names = [*_FAKE_ATTRS, "scripts.app"]
+        if "scripts" not in imported_before:
+            injected_names.append("scripts")
+        # Modules the import pulled in as a side effect (fastapi, starlette, ...) are left alone.
+        _INJECTED.extend(
+            sys.modules[name] for name in injected_names if name in sys.modules and name not in real_modules
+        )
+
+
+def tearDownModule():
+    """
+    Remove the modules imported against the fakes so they do not outlive this test module.
+    """
+    for module in _INJECTED:
+        if sys.modules.get(module.__name__) is module:
+            del sys.modules[module.__name__]
+        parent_name, _, attr = module.__name__.rpartition(".")
+        parent = sys.modules.get(parent_name)
+        if getattr(parent, attr, None) is module:
+            delattr(parent, attr)
+    _INJECTED.clear()
 
 
 class SpeakerDiarizationChunkingTests(unittest.TestCase):
-    @patch("scripts.app.write_audio", return_value="/tmp/audio.wav")
-    @patch("scripts.app.openai_services.extract_dialogue", return_value=[{"speaker": "A", "text": "hello"}])
-    @patch("scripts.app.whisper_api.transcribe_chunked")
-    @patch("scripts.app.whisper_api.transcribe_single_pass", return_value="full transcript")
-    def test_process_audio_uses_single_pass_when_chunk_seconds_zero(
-        self,
-        mock_single_pass,
-        mock_chunked,
-        _mock_dialogue,
-        _mock_write_audio,
-    ):
-        response = app.process_audio(b"audio", "clip.wav", chunk_seconds=0)
-
-        mock_single_pass.assert_called_once_with("/tmp/audio.wav")
-        mock_chunked.assert_not_called()
-        self.assertEqual(response["transcript"], "full transcript")
-        self.assertIn("diarization_result", response)
-
-    @patch("scripts.app.write_audio", return_value="/tmp/audio.wav")
-    @patch("scripts.app.openai_services.extract_dialogue", return_value=[{"speaker": "A", "text": "hello"}])
-    @patch("scripts.app.whisper_api.transcribe_chunked", return_value="chunked transcript")
-    @patch("scripts.app.whisper_api.transcribe_single_pass")
-    def test_process_audio_uses_chunked_when_chunk_seconds_positive(
-        self,
-        mock_single_pass,
-        mock_chunked,
-        _mock_dialogue,
-        _mock_write_audio,
-    ):
-        response = app.process_audio(b"audio", "clip.wav", chunk_seconds=120)
-
-        mock_chunked.assert_called_once_with("/tmp/audio.wav", chunk_seconds=120)
-        mock_single_pass.assert_not_called()
-        self.assertEqual(response["transcript"], "chunked transcript")
-        self.assertIn("diarization_result", response)
+    @classmethod
+    def setUpClass(cls):
+        cls.app = sys.modules.get("scripts.app") or _import_app()
+        cls.mock_openai_services = create_autospec(AI, instance=True)
+        cls.mock_whisper = _whisper_instance()
+        patcher = patch.multiple(
+            cls.app,
+            write_audio=DEFAULT,
+            openai_services=cls.mock_openai_services,
+            whisper_api=cls.mock_whisper,
+        )
+        cls.mock_write_audio = patcher.start()["write_audio"]
+        cls.addClassCleanup(patcher.stop)
+        cls.mock_dialogue = cls.mock_openai_services.extract_dialogue
+        cls.mock_chunked = cls.mock_whisper.transcribe_chunked
+        cls.mock_single_pass = cls.mock_whisper.transcribe_single_pass
+
+    def setUp(self):
+        for mock in (self.mock_write_audio, self.mock_openai_services, self.mock_whisper):
+            mock.reset_mock(return_value=True, side_effect=True)
+        self.mock_dialogue.return_value = _DIALOGUE
+
+    def test_process_audio_picks_transcription_mode_from_chunk_seconds(self):
+        cases = [
+            (0, self.mock_single_pass, self.mock_chunked, call(_AUDIO_PATH), _FULL_TRANSCRIPT),
+            (120, self.mock_chunked, self.mock_single_pass, call(_AUDIO_PATH, chunk_seconds=120), _CHUNKED_TRANSCRIPT),
+        ]
+        for chunk_seconds, expected_mock, unused_mock, expected_call, transcript in cases:
+            with self.subTest(chunk_seconds=chunk_seconds):
+                self.mock_single_pass.reset_mock()
+                self.mock_chunked.reset_mock()
+                expected_mock.return_value = transcript
+
+                response = self.app.process_audio(_AUDIO_PATH, chunk_seconds=chunk_seconds)
+
+                self.assertEqual(expected_mock.call_args_list, [expected_call])
+                unused_mock.assert_not_called()
+                self.assertEqual(response["transcript"], transcript)
+                self.assertEqual(response["diarization_result"], _DIALOGUE)
+
+    def test_generate_ndjson_streams_chunks_then_result(self):
+        mock_chunked_iter = self.mock_whisper.transcribe_chunked_iter
+        mock_chunked_iter.return_value = iter([(1, "world"), (0, "hello")])
+
+        lines = [json.loads(line) for line in self.app.generate_ndjson(_AUDIO_PATH, chunk_seconds=120)]
+
+        mock_chunked_iter.assert_called_once_with(_AUDIO_PATH, chunk_seconds=120)
+        self.mock_dialogue.assert_called_once_with("hello world")
+        self.assertEqual(lines[:2], [{"chunk": 1, "text": "world"}, {"chunk": 0, "text": "hello"}])
+        self.assertEqual(lines[2]["transcript"], "hello world")
+        self.assertEqual(lines[2]["diarization_result"], list(_DIALOGUE))
+
+    def test_speaker_diarization_rejects_oversized_upload(self):
+        from fastapi.testclient import TestClient
+
+        with patch.object(self.app, "MAX_UPLOAD_BYTES", 10):
+            response = TestClient(self.app.app).post(
+                "/speaker-diarization",
+                files={"audio_file": ("clip.wav", b"0" * 100, "audio/wav")},
+            )
+
+        self.assertEqual(response.status_code, 413)
+        self.mock_write_audio.assert_not_called()
+
+    def _run_upload_limit(self, headers, body_parts):
+        """
+        Drive UploadLimitMiddleware with an inner app that reads the whole body.
+
+        :return: (sent messages, number of body parts received, inner app called)
+        """
+        parts = list(body_parts)
+        received = []
+        called = []
+
+        async def receive():
+            body = parts.pop(0)
+            received.append(body)
+            return {"type": "http.request", "body": body, "more_body": bool(parts)}
+
+        async def inner_app(_scope, inner_receive, _send):
+            called.append(True)
+            while (await inner_receive())["more_body"]:
+                pass
+
+        sent = []
+
+        async def send(message):
+            sent.append(message)
+
+        scope = {"type": "http", "method": "POST", "path": "/speaker-diarization", "headers": headers}
+        middleware = self.app.UploadLimitMiddleware(inner_app)
+        with patch.object(self.app, "MAX_UPLOAD_BYTES", 10):
+            asyncio.run(middleware(scope, receive, send))
+        return sent, len(received), bool(called)
+
+    def test_upload_limit_rejects_declared_length_without_reading_body(self):
+        sent, received, called = self._run_upload_limit([(b"content-length", b"100")], [b"0" * 100])
+
+        self.assertEqual(sent[0]["status"], 413)
+        self.assertEqual(received, 0)
+        self.assertFalse(called)
+
+    def test_upload_limit_rejects_malformed_content_length(self):
+        sent, received, called = self._run_upload_limit([(b"content-length", b"lots")], [b"0"])
+
+        self.assertEqual(sent[0]["status"], 400)
+        self.assertEqual(received, 0)
+        self.assertFalse(called)
+
+    def test_upload_limit_stops_reading_body_without_content_length(self):
+        with self.assertRaises(self.app.HTTPException) as ctx:
+            self._run_upload_limit([], [b"0" * 8] * 5)
+
+        self.assertEqual(ctx.exception.status_code, 413)
+
+    def test_teardown_keeps_modules_imported_as_a_side_effect(self):
+        script = "\n".join([
+            "import sys",
+            "import test_speaker_diarization_chunking as module",
+            "app = module._import_app()",
+            "module.tearDownModule()",
+            "import fastapi",
+            "assert app.HTTPException is fastapi.HTTPException",
+            "assert 'scripts.app' not in sys.modules",
+            "assert not isinstance(sys.modules['scripts.speech_to_text'].Whisper, module.MagicMock)",
+        ])
+        tests_dir = os.path.dirname(os.path.abspath(__file__))
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join([os.path.dirname(tests_dir), tests_dir]))
+
+        result = subprocess.run([sys.executable, "-c", script], env=env, capture_output=True, text=True)
+
+        self.assertEqual(result.returncode, 0, result.stderr)
 
     def test_parse_chunk_seconds_rejects_non_integer(self):
-        with self.assertRaises(HTTPException) as ctx:
-            app.parse_chunk_seconds("not-an-int")
+        with self.assertRaises(self.app.HTTPException) as ctx:
+            self.app.parse_chunk_seconds("not-an-int")
 
         self.assertEqual(ctx.exception.status_code, 400)
         self.assertIn("must be an integer", ctx.exception.detail)
@@ -0,0 +1,50 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import soundfile as sf
+
+from scripts import utils
+
+
+class WriteAudioTests(unittest.TestCase):
+    def setUp(self):
+        tmp_dir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp_dir.cleanup)
+        self.root_path = tmp_dir.name
+        os.makedirs(os.path.join(self.root_path, "resources/audios"))
+        patcher = patch.object(utils, "get_project_root", return_value=self.root_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _wav_bytes(self, samplerate, channels):
+        buffer = io.BytesIO()
+        sf.write(buffer, np.zeros((1600, channels), dtype=np.int16), samplerate, format='WAV', subtype='PCM_16')
+        return buffer.getvalue()
+
+    def test_compliant_wav_is_kept_without_ffmpeg(self):
+        payload = self._wav_bytes(16000, 1)
+
+        with patch.object(utils.subprocess, "run") as mock_run:
+            save_path = utils.write_audio(io.BytesIO(payload), "clip.wav")
+
+        mock_run.assert_not_called()
+        self.assertTrue(save_path.endswith(".wav"))
+        with open(save_path, "rb") as f:
+            self.assertEqual(f.read(), payload)
+        self.assertEqual(os.listdir(os.path.join(self.root_path, "resources/audios")), [os.path.basename(save_path)])
+
+    def test_other_audio_is_converted_with_ffmpeg(self):
+        with patch.object(utils.subprocess, "run") as mock_run:
+            save_path = utils.write_audio(io.BytesIO(self._wav_bytes(44100, 2)), "clip.wav")
+
+        mock_run.assert_called_once()
+        self.assertEqual(mock_run.call_args.args[0][-1], save_path)
+        self.assertTrue(save_path.endswith(".mp3"))
+
+
+if __name__ == "__main__":
+    unittest.main()